@@ -1,14 +1,51 @@
-import argparse
+import sys
+import types
 
+__all__ = [
+    "Namespace",
+    "Command",
+    "RawCommand",
+    "cmdopt",
+    "command_name",
+    "argument",
+    "with_commands",
+    "root",
+    "namespace",
+]
 
-class _namespaced:
+
+# Bumped whenever a command tree is modified. Cached parsers are only reused
+# if no command was added or changed since they have been built.
+_generation = 0
+
+# Constructors set attributes via _init_attr, bypassing the change tracking
+# of _subcommand.__setattr__: new objects are not part of a cached parser.
+_init_attr = object.__setattr__
+
+
+class _subcommand:
+    """
+    Base of all commands and namespaces that can be added to a namespace.
+
+    Assigning a public attribute (e.g. name, doc, fn) invalidates all cached
+    parsers.
+    """
+
+    def __setattr__(self, name, value):
+        global _generation
+        if not name.startswith("_"):
+            _generation += 1
+        object.__setattr__(self, name, value)
+
+
+class _namespaced(_subcommand):
     """
     All objects implementing _namespaced can be used as namespaces
     for adding sub commands.
     """
 
     def __init__(self):
-        self._subcommands = {}
+        _init_attr(self, "_subcommands", {})
 
     def namespace(self, name, *opts):
         """ Create new sub-namespace without runnable function.
@@ -23,13 +60,16 @@ class _namespaced:
         """ Add a single sub-command or namespace to the current namespace.
         """
 
+        global _generation
         self._subcommands[sub.name] = sub
+        _generation += 1
 
     def add_subcommands(self, *cmds):
         """ Add a list of sub-commands and namespaces to the current namespace.
         """
-        for cmd in cmds:
-            self.add_subcommand(cmd)
+        global _generation
+        self._subcommands.update((cmd.name, cmd) for cmd in cmds)
+        _generation += 1
 
     def command(self, *opts):
         """ Create sub-command decorator.
@@ -54,20 +94,26 @@ class _namespaced:
         return self._make_command(RawCommand, *opts)
 
     def _make_command(self, cmdclass, *opts):
+        if len(opts) == 1 and callable(opts[0]):
+            # used as bare decorator: no options to apply
+            fn = opts[0]
+            cmd = cmdclass(fn.__name__, fn)
+            self.add_subcommand(cmd)
+            return cmd
+
         def do(fn):
             cmd = cmdclass(fn.__name__, fn, *opts)
             for opt in opts:
-                opt.init_cmd(cmd)
+                if getattr(type(opt), "_HAS_INIT_CMD", True):
+                    opt.init_cmd(cmd)
             self.add_subcommand(cmd)
             return cmd
-
-        if len(opts) == 1 and callable(opts[0]):
-            fn, opts = opts[0], []
-            return do(fn)
         return do
 
     def _add_subparsers(self, parser):
-        if len(self._subcommands) == 0:
+        import argparse
+
+        if not self._subcommands:
             return
 
         subparsers = _SubcommandList(parser.prog)
@@ -75,9 +121,10 @@ class _namespaced:
             cmd._add_subparser(subparsers)
 
         parser.add_argument("command",
-                            action=_Subaction,
+                            action=_subaction_cls(),
                             actions=subparsers.commands,
-                            choices=list(subparsers.commands.keys()),
+                            funcs=subparsers.funcs,
+                            choices=subparsers.commands.keys(),
                             option_strings=[],
                             nargs=argparse.PARSER,
                             )
@@ -96,33 +143,44 @@ class Namespace(_namespaced):
 
     def __init__(self, name, *opts):
         super(Namespace, self).__init__()
-        self.name = name
-        self.doc = name
-        self._opts = opts
-        for opt in self._opts:
-            opt.init_namespace(self)
+        _init_attr(self, "name", name)
+        _init_attr(self, "doc", name)
+        hooks = []
+        _init_attr(self, "_init_args_hooks", hooks)
+        _init_attr(self, "_parser_cache", None)
+        _init_attr(self, "_parser_generation", 0)
+        for opt in opts:
+            cls = type(opt)
+            if getattr(cls, "_HAS_INIT_ARGS", True):
+                hooks.append(opt.init_args)
+            if getattr(cls, "_HAS_INIT_NAMESPACE", True):
+                opt.init_namespace(self)
 
     def __call__(self, *args, **kwargs):
         self.run(*args, **kwargs)
 
     def run(self, parser=None, args=None):
+        import argparse
+
         if not parser:
-            parser = argparse.ArgumentParser()
-        self._init_argparse(parser)
+            parser = self._parser_cache
+            if parser is None or self._parser_generation != _generation:
+                parser = argparse.ArgumentParser()
+                self._init_argparse(parser)
+                self._parser_cache = parser
+                self._parser_generation = _generation
+        else:
+            self._init_argparse(parser)
         args = parser.parse_args(args)
         args.func(args)
 
     def _add_subparser(self, action):
-        parser = action.add_parser(self.name, description=self.doc)
-        self._init_argparse(parser)
+        action.add_parser(self.name, self._init_argparse, description=self.doc)
 
     def _init_argparse(self, parser):
-        def fn(args):
-            parser.print_help()
-            exit(1)
-        for opt in self._opts:
-            opt.init_args(parser)
-        parser.set_defaults(func=fn)
+        for init_args in self._init_args_hooks:
+            init_args(parser)
+        parser.set_defaults(func=_HelpExit(parser))
         self._add_subparsers(parser)
 
 
@@ -131,33 +189,36 @@ class Command(_namespaced):
 
     def __init__(self, name, fn, *opts):
         super(Command, self).__init__()
-        self.name = name
-        self.fn = fn
-        self._opts = opts
-        self.doc = ""
+        _init_attr(self, "name", name)
+        _init_attr(self, "fn", fn)
+        _init_attr(self, "_init_args_hooks",
+                   [o.init_args for o in opts
+                    if getattr(type(o), "_HAS_INIT_ARGS", True)])
+        _init_attr(self, "doc", "")
 
     def __call__(self, *args, **kwargs):
         self.fn(*args, **kwargs)
 
     def _add_subparser(self, action):
         doc = self.doc if self.doc else self.fn.__doc__
-        parser = action.add_parser(self.name, description=doc)
-        self._init_argparse(parser)
+        action.add_parser(self.name, self._init_argparse, description=doc)
+        if not self._init_args_hooks and not self._subcommands:
+            action.funcs[self.name] = self.fn
 
     def _init_argparse(self, parser):
-        for opt in self._opts:
-            opt.init_args(parser)
+        for init_args in self._init_args_hooks:
+            init_args(parser)
         parser.set_defaults(func=self.fn)
         self._add_subparsers(parser)
 
 
-class RawCommand:
+class RawCommand(_subcommand):
     """ Executable raw sub-command """
 
     def __init__(self, name, fn, *args, **kwargs):
-        self.name = name
-        self.fn = fn
-        self.doc = ""
+        _init_attr(self, "name", name)
+        _init_attr(self, "fn", fn)
+        _init_attr(self, "doc", "")
 
     def _add_subparser(self, action):
         parser = action.add_rawparser(self.name, self.fn, description=self.doc)
@@ -166,17 +227,21 @@ class RawCommand:
     def add_subcommand(self, cmd):
         raise Exception("Can not add subcommands to raw commands")
 
+    def add_subcommands(self, *cmds):
+        raise Exception("Can not add subcommands to raw commands")
+
 
 class _SubcommandList:
     def __init__(self, prog):
         self.commands = {}
+        self.funcs = {}
         self.prog_prefix = prog
 
-    def add_parser(self, name, *args, **kwargs):
+    def add_parser(self, name, init, *args, **kwargs):
         if kwargs.get('prog') is None:
             kwargs['prog'] = '%s %s' % (self.prog_prefix, name)
 
-        parser = argparse.ArgumentParser(*args, **kwargs)
+        parser = _LazyParser(init, *args, **kwargs)
         self.commands[name] = parser
         return parser
 
@@ -189,47 +254,109 @@ class _SubcommandList:
         return parser
 
 
+class _LazyParser:
+    """ Proxy for a sub-command ArgumentParser.
+
+    The parser is created and passed to init on first use, such that only
+    the sub-commands selected by the user pay for building their parsers.
+    """
+
+    __slots__ = ("_init", "_args", "_kwargs", "_parser")
+
+    def __init__(self, init, *args, **kwargs):
+        self._init = init
+        self._args = args
+        self._kwargs = kwargs
+        self._parser = None
+
+    def __call__(self):
+        if self._parser is None:
+            import argparse
+
+            parser = argparse.ArgumentParser(*self._args, **self._kwargs)
+            self._init(parser)
+            self._parser = parser
+        return self._parser
+
+    def __getattr__(self, name):
+        return getattr(self(), name)
+
+
 class _RawParser:
+    __slots__ = ("dest", "_defaults")
+
     def __init__(self, dest, *args, **kwargs):
         self.dest = dest
         self._defaults = {}
 
-    def parse_args(self, args, namespace=None):
-        if namespace is None:
-            namespace = argparse.Namespace()
-        for k, v in self._defaults.items():
-            setattr(namespace, k, v)
-        setattr(namespace, self.dest, args)
-        return namespace
+    def parse_args(self, args):
+        return types.SimpleNamespace(**self._defaults, **{self.dest: args})
 
     def set_defaults(self, **kwargs):
         self._defaults.update(kwargs)
 
 
-class _Subaction(argparse.Action):
-    def __init__(self, actions, *args, **kwargs):
-        super(_Subaction, self).__init__(*args, **kwargs)
-        self.actions = actions
+class _HelpExit:
+    """ Default function of a namespace. Prints the help text and exits. """
 
-    def __call__(self, parser, namespace, values, option_string=None):
-        if not values:
-            return
+    __slots__ = ("parser",)
 
-        name = values[0]
-        args = values[1:]
-        setattr(namespace, self.dest, name)
+    def __init__(self, parser):
+        self.parser = parser
+
+    def __call__(self, args):
+        self.parser.print_help()
+        sys.exit(1)
+
+
+_Subaction = None
+
+
+def _subaction_cls():
+    """ Create the argparse action dispatching to sub-commands.
+
+    The class is created on first use, such that importing clidec does not
+    require argparse to be loaded.
+    """
 
-        try:
-            parser = self.actions[name]
-        except:
-            choices = ", ".join(self.actions.keys())
-            raise argparse.ArgumentError(self,
-                                         f"unknown parser {name}, ({choices})")
+    global _Subaction
+    if _Subaction is not None:
+        return _Subaction
 
-        # parse all the remaining options into the namespace
-        subnamespace = parser.parse_args(args)
-        for k, v in vars(subnamespace).items():
-            setattr(namespace, k, v)
+    import argparse
+
+    class _Subaction(argparse.Action):
+        def __init__(self, actions, funcs, *args, **kwargs):
+            super(_Subaction, self).__init__(*args, **kwargs)
+            self.actions = actions
+            self.funcs = funcs
+
+        def __call__(self, parser, namespace, values, option_string=None):
+            # nargs=PARSER guarantees values holds at least the command name
+            name = values[0]
+            args = values[1:]
+            namespace.__dict__[self.dest] = name
+
+            if not args:
+                # commands without arguments do not need their parser to run
+                func = self.funcs.get(name)
+                if func is not None:
+                    namespace.func = func
+                    return
+
+            parser = self.actions.get(name)
+            if parser is None:
+                choices = ", ".join(self.actions)
+                raise argparse.ArgumentError(
+                    self, f"unknown parser {name}, ({choices})")
+
+            # parse all the remaining options into the namespace. The
+            # sub-parser gets a fresh namespace, as argparse does not apply
+            # defaults (e.g. func) that are already set by the parent parser.
+            subnamespace = parser.parse_args(args)
+            namespace.__dict__.update(subnamespace.__dict__)
+
+    return _Subaction
 
 
 class cmdopt:
@@ -237,8 +364,25 @@ class cmdopt:
 
     classes implementing cmdopt can modify namespaces, commandos and 
     the argparse parser.
+
+    cmdopt declares empty __slots__. Subclasses that do not declare
+    __slots__ themselves still get an instance __dict__.
     """
 
+    __slots__ = ()
+
+    # Set per subclass, telling which hooks are overwritten and need to be
+    # called. Options not inheriting from cmdopt have all hooks called.
+    _HAS_INIT_NAMESPACE = False
+    _HAS_INIT_CMD = False
+    _HAS_INIT_ARGS = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._HAS_INIT_NAMESPACE = cls.init_namespace is not cmdopt.init_namespace
+        cls._HAS_INIT_CMD = cls.init_cmd is not cmdopt.init_cmd
+        cls._HAS_INIT_ARGS = cls.init_args is not cmdopt.init_args
+
     def init_namespace(self, namespace): pass
 
     def init_cmd(self, cmd): pass
@@ -249,6 +393,8 @@ class cmdopt:
 class command_name(cmdopt):
     """ Overwrite the command or namespace name.  """
 
+    __slots__ = ("_name",)
+
     def __init__(self, name):
         self._name = name
 
@@ -266,6 +412,8 @@ class argument(cmdopt):
     supported by ArgumentParser.add_argument.
     """
 
+    __slots__ = ("_args", "_kwargs")
+
     def __init__(self, *args, **kwargs):
         self._args = args
         self._kwargs = kwargs
@@ -278,6 +426,8 @@ class with_commands(cmdopt):
     """ Add a list of existing commands and namespace to the new namespace.
     """
 
+    __slots__ = ("_commands",)
+
     def __init__(self, *commands):
         self._commands = commands
 
@@ -286,8 +436,7 @@ class with_commands(cmdopt):
     def init_cmd(self, cmd): self._add_commands(cmd)
 
     def _add_commands(self, cmd):
-        for sub in self._commands:
-            cmd.add_subcommand(sub)
+        cmd.add_subcommands(*self._commands)
 
 
 def root(*opts):
@@ -1,7 +1,11 @@
-from setuptools import setup, find_packages
+import sys
 
-with open("README.md", "r") as f:
-    long_description = f.read()
+from setuptools import setup
+
+long_description = ""
+if {"sdist", "bdist_wheel", "upload"}.intersection(sys.argv):
+    with open("README.md", "r", encoding="utf-8") as f:
+        long_description = f.read()
 
 setup(
     name="clidec",
@@ -11,6 +15,6 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/urso/clidec",
-    packages=find_packages(),
+    packages=["clidec"],
     install_requires=[],
 )
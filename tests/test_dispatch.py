@@ -0,0 +1,124 @@
+import contextlib
+import io
+import unittest
+
+from clidec import root, namespace, with_commands
+
+
+def subparsers(parser):
+    """ Return the sub-command parsers registered on parser. """
+    for action in parser._actions:
+        if action.dest == "command":
+            return action.actions
+    return {}
+
+
+class LazyParserTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.used = namespace("used")
+        self.unused = namespace("unused")
+        self.empty = namespace("empty")
+
+        @self.used.command
+        def run(args):
+            self.calls.append("run")
+
+        @self.unused.command
+        def other(args):
+            self.calls.append("other")
+
+        self.main = root(with_commands(self.used, self.unused, self.empty))
+
+    def test_unselected_parsers_are_not_built(self):
+        self.main(args=["used", "run"])
+        parsers = subparsers(self.main._parser_cache)
+        self.assertIsNotNone(parsers["used"]._parser)
+        self.assertIsNone(parsers["unused"]._parser)
+        self.assertIsNone(parsers["empty"]._parser)
+        self.assertEqual(["run"], self.calls)
+
+    def test_nested_namespace_prints_own_help(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            with self.assertRaises(SystemExit) as cm:
+                self.main(args=["empty"])
+        self.assertEqual(1, cm.exception.code)
+        self.assertIn(" empty [-h]", out.getvalue())
+
+
+class FastPathTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.ns = namespace("ns")
+
+        @self.ns.command
+        def plain(args):
+            """ plain command """
+            self.calls.append("plain")
+
+        self.main = root(with_commands(self.ns))
+
+    def parsers(self):
+        return subparsers(subparsers(self.main._parser_cache)["ns"]())
+
+    def run_exit(self, *argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            with self.assertRaises(SystemExit) as cm:
+                self.main(args=list(argv))
+        return cm.exception.code, out.getvalue()
+
+    def test_command_without_arguments_skips_parser(self):
+        self.main(args=["ns", "plain"])
+        self.assertEqual(["plain"], self.calls)
+        self.assertIsNone(self.parsers()["plain"]._parser)
+
+    def test_help_uses_parser(self):
+        code, out = self.run_exit("ns", "plain", "-h")
+        self.assertEqual(0, code)
+        self.assertIn("plain command", out)
+        self.assertIsNotNone(self.parsers()["plain"]._parser)
+
+    def test_extra_arguments_use_parser(self):
+        code, out = self.run_exit("ns", "plain", "extra")
+        self.assertEqual(2, code)
+        self.assertIn("unrecognized arguments: extra", out)
+        self.assertEqual([], self.calls)
+
+    def test_command_with_subcommands_is_not_fast_path(self):
+        child = namespace("child")
+
+        @child.command
+        def leaf(args):
+            self.calls.append("leaf")
+
+        @self.ns.command(with_commands(child))
+        def group(args):
+            self.calls.append("group")
+
+        self.main(args=["ns", "group", "child", "leaf"])
+        self.assertEqual(["leaf"], self.calls)
+        self.assertIsNotNone(self.parsers()["group"]._parser)
+
+
+class RawCommandTest(unittest.TestCase):
+    def test_arguments_are_captured_as_is(self):
+        seen = []
+        ns = namespace("ns")
+
+        @ns.rawcommand
+        def raw(args):
+            seen.append(args)
+
+        root(with_commands(ns))(args=["ns", "raw", "-a", "--b", "c"])
+
+        self.assertEqual(1, len(seen))
+        args = seen[0]
+        self.assertEqual(["-a", "--b", "c"], args.raw)
+        self.assertEqual("raw", args.command)
+        self.assertIs(raw.fn, args.func)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from clidec import root, namespace, with_commands, cmdopt
+
+
+class Duck:
+    """ Option implementing the cmdopt hooks without inheriting cmdopt. """
+
+    def __init__(self):
+        self.namespaces = []
+        self.cmds = []
+
+    def init_namespace(self, ns):
+        self.namespaces.append(ns)
+
+    def init_cmd(self, cmd):
+        self.cmds.append(cmd)
+
+    def init_args(self, parser):
+        parser.add_argument("--duck")
+
+
+class DuckTypedOptionTest(unittest.TestCase):
+    def test_hooks_are_called(self):
+        seen = []
+        ns_opt, cmd_opt = Duck(), Duck()
+        ns = namespace("d", ns_opt)
+
+        @ns.command(cmd_opt)
+        def quack(args):
+            seen.append(args.duck)
+
+        root(with_commands(ns))(args=["d", "quack", "--duck", "yes"])
+
+        self.assertEqual([ns], ns_opt.namespaces)
+        self.assertEqual([quack], cmd_opt.cmds)
+        self.assertEqual(["yes"], seen)
+
+
+class tag(cmdopt):
+    """ Option attaching state to the command or namespace. """
+
+    def __init__(self, value):
+        self.value = value
+
+    def init_namespace(self, ns):
+        ns.tag = self.value
+
+    def init_cmd(self, cmd):
+        cmd.tag = self.value
+
+
+class OptionStateTest(unittest.TestCase):
+    def test_hooks_can_set_attributes(self):
+        ns = namespace("ns", tag("n"))
+
+        @ns.command(tag("c"))
+        def cmd(args):
+            pass
+
+        @ns.rawcommand(tag("r"))
+        def raw(args):
+            pass
+
+        self.assertEqual("n", ns.tag)
+        self.assertEqual("c", cmd.tag)
+        self.assertEqual("r", raw.tag)
+        self.assertEqual("c", tag("c").value)
+
+
+if __name__ == "__main__":
+    unittest.main()
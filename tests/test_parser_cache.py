@@ -0,0 +1,78 @@
+import contextlib
+import io
+import unittest
+
+from clidec import root, namespace, with_commands
+
+
+class ParserCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.n2 = namespace("n2")
+
+        @self.n2.command
+        def parent(args):
+            """ old doc """
+            self.calls.append("parent")
+
+        self.parent = parent
+        self.main = root(with_commands(self.n2))
+
+    def help(self, *argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            with self.assertRaises(SystemExit):
+                self.main(args=list(argv) + ["-h"])
+        return out.getvalue()
+
+    def test_parser_is_reused(self):
+        self.main(args=["n2", "parent"])
+        parser = self.main._parser_cache
+        self.main(args=["n2", "parent"])
+        self.assertIs(parser, self.main._parser_cache)
+        self.assertEqual(["parent", "parent"], self.calls)
+
+    def test_add_to_nested_namespace_invalidates_root(self):
+        self.main(args=["n2", "parent"])
+        parser = self.main._parser_cache
+
+        @self.n2.command
+        def late(args):
+            self.calls.append("late")
+
+        self.main(args=["n2", "late"])
+        self.assertIsNot(parser, self.main._parser_cache)
+        self.assertEqual(["parent", "late"], self.calls)
+
+    def test_doc_change_invalidates_root(self):
+        self.assertIn("old doc", self.help("n2", "parent"))
+        self.parent.doc = "new doc"
+        help = self.help("n2", "parent")
+        self.assertIn("new doc", help)
+        self.assertNotIn("old doc", help)
+
+    def test_name_change_invalidates_root(self):
+        self.main(args=["n2", "parent"])
+        self.n2.name = "renamed"
+        self.main(args=["renamed", "parent"])
+        self.assertEqual(["parent", "parent"], self.calls)
+
+    def test_fn_change_invalidates_root(self):
+        self.main(args=["n2", "parent"])
+        self.parent.fn = lambda args: self.calls.append("replaced")
+        self.main(args=["n2", "parent"])
+        self.assertEqual(["parent", "replaced"], self.calls)
+
+    def test_fn_change_updates_description(self):
+        def replaced(args):
+            """ replaced doc """
+
+        self.assertIn("old doc", self.help("n2", "parent"))
+        self.parent.fn = replaced
+        help = self.help("n2", "parent")
+        self.assertIn("replaced doc", help)
+        self.assertNotIn("old doc", help)
+
+
+if __name__ == "__main__":
+    unittest.main()